@@ -1,16 +1,38 @@
+from __future__ import annotations
+
 import os
 import re
+import copy
+import hashlib
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
 import logging
 from datetime import datetime
 from dotenv import load_dotenv
-from textwrap import dedent
+from typing import TYPE_CHECKING
+
+from prompts import (
+    ANALYSIS_TEAM_INSTRUCTIONS,
+    ANALYSIS_TEAM_INSTRUCTIONS_WEB_FALLBACK,
+    FINANCE_INSTRUCTIONS,
+    INTRO_MD,
+    NEWS_SUMMARY_TEMPLATE,
+    NEWS_TEAM_INSTRUCTIONS,
+    SIDEBAR_EXAMPLES_MD,
+    UNIFIED_INSTRUCTIONS,
+    WEB_SEARCH_INSTRUCTIONS,
+)
+from tickers import extract_price, find_assets, is_news_query, names_entity, news_topic, resolve_ticker, symbol_key
+from tools.cache import SingleFlight, TTLCache
 
-from agno.agent import Agent
-from agno.models.anthropic import Claude
-from agno.models.openai import OpenAIChat
-from agno.tools.duckduckgo import DuckDuckGoTools
-from agno.tools.yfinance import YFinanceTools
+# agno, the LLM SDKs, yfinance and httpx are imported inside the factories that
+# need them, so Streamlit can paint the page before the heavy imports run.
+if TYPE_CHECKING:
+    import httpx
+    from agno.agent import Agent
 
 # Configure logging
 logging.basicConfig(
@@ -19,311 +41,585 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# uvloop is a faster drop-in event loop; it is not available on Windows.
+try:
+    import uvloop
+    LOOP_FACTORY = uvloop.new_event_loop
+except ImportError:
+    LOOP_FACTORY = None
+
 # Load API keys
-load_dotenv()
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY") or st.secrets.get("OPENAI_API_KEY")
-ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY") or st.secrets.get("ANTHROPIC_API_KEY")
-
-# Asset mapping for ticker resolution
-ASSET_MAPPING = {
-    "SOL": "SOL-USD",
-    "BTC": "BTC-USD",
-    "ETH": "ETH-USD",
-    "AAPL": "AAPL",
-    "TSLA": "TSLA",
-    "NVDA": "NVDA",
+@st.cache_resource(show_spinner=False)
+def load_api_keys() -> tuple:
+    # Cached per process: reruns re-execute this module, but .env and the
+    # secrets TOML are only read, and the key patterns compiled, once.
+    load_dotenv()
+    openai_key = os.getenv("OPENAI_API_KEY") or st.secrets.get("OPENAI_API_KEY")
+    anthropic_key = os.getenv("ANTHROPIC_API_KEY") or st.secrets.get("ANTHROPIC_API_KEY")
+    for name, key, pattern in (("OPENAI_API_KEY", openai_key, r'^sk-[A-Za-z0-9_-]{20,}$'), ("ANTHROPIC_API_KEY", anthropic_key, r'^sk-ant-[A-Za-z0-9_-]{20,}$')):
+        if key and not re.match(pattern, key):
+            logger.warning(f"{name} is set but does not look like a valid key")
+    return openai_key, anthropic_key
+
+OPENAI_API_KEY, ANTHROPIC_API_KEY = load_api_keys()
+
+# Process-wide caps on in-flight LLM calls, to stay under provider rate limits. The
+# retrieval agents on the shared loop and the streamed team calls are capped separately.
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+
+# Streamed tokens are flushed to the page at most this often (seconds), so a fast
+# model does not send one websocket delta per token
+STREAM_FLUSH_INTERVAL = 0.05
+
+# How long retrieval results are reused: prices move fast, news less so
+PRICE_CACHE_TTL = 60
+NEWS_CACHE_TTL = 15 * 60
+
+# Per-ticker analyses are reused for 30 seconds, matching the price refresh cadence
+ANALYSIS_CACHE_TTL = 30
+
+# Entity-specific news summaries are reused for 5 minutes under a coarse topic key
+NEWS_SUMMARY_TTL = 5 * 60
+INSUFFICIENT_DATA_MESSAGE = "Insufficient data: no market data or web results were found for this query."
+
+@st.cache_resource(show_spinner=False)
+def get_http_client() -> httpx.Client:
+    import httpx
+
+    # One pooled HTTP/2 client per process so LLM calls reuse warm TLS connections.
+    return httpx.Client(
+        http2=True,
+        limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+        timeout=60,
+    )
+
+@st.cache_resource(show_spinner=False)
+def get_async_http_client() -> httpx.AsyncClient:
+    import httpx
+
+    # Async pools are bound to an event loop, so this client is only ever used
+    # from the shared loop returned by get_event_loop().
+    return httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+        timeout=60,
+    )
+
+@st.cache_resource(show_spinner=False)
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    # One long-lived loop on a daemon thread runs every session's async work,
+    # which lets the async SDK clients keep their connections between queries.
+    loop = LOOP_FACTORY() if LOOP_FACTORY else asyncio.new_event_loop()
+    # agno runs sync tools through asyncio.to_thread / run_in_executor(None); route
+    # those to the shared bounded pool rather than a second default pool.
+    loop.set_default_executor(get_executor())
+    threading.Thread(target=loop.run_forever, name="agent-event-loop", daemon=True).start()
+    return loop
+
+def create_openai_model(model_id: str):
+    from openai import AsyncOpenAI, OpenAI
+    from agno.models.openai import OpenAIChat
+
+    return OpenAIChat(
+        id=model_id,
+        api_key=OPENAI_API_KEY,
+        temperature=0.1,
+        top_p=0.9,
+        client=OpenAI(api_key=OPENAI_API_KEY, http_client=get_http_client()),
+        async_client=AsyncOpenAI(api_key=OPENAI_API_KEY, http_client=get_async_http_client()),
+    )
+
+def create_claude_model(model_id: str):
+    from anthropic import Anthropic, AsyncAnthropic
+    from agno.models.anthropic import Claude
+
+    # The system prompt is marked cacheable, but Anthropic only caches prefixes of at
+    # least 2048 tokens on Haiku. The instructions in prompts.py are well below that,
+    # so this is a no-op until they grow; it costs nothing meanwhile.
+    return Claude(
+        id=model_id,
+        api_key=ANTHROPIC_API_KEY,
+        temperature=0.1,
+        cache_system_prompt=True,
+        client=Anthropic(api_key=ANTHROPIC_API_KEY, http_client=get_http_client()),
+        async_client=AsyncAnthropic(api_key=ANTHROPIC_API_KEY, http_client=get_async_http_client()),
+    )
+
+# Selectable models, in sidebar order. Each factory imports only its provider's SDK.
+MODEL_FACTORIES = {
+    "claude-3-5-haiku-20241022": create_claude_model,
+    "gpt-4o": create_openai_model,
 }
+DEFAULT_MODEL = "claude-3-5-haiku-20241022"
 
 def create_model(model_choice: str):
-    if model_choice == "claude-3-5-haiku-20241022":
-        return Claude(id=model_choice, api_key=ANTHROPIC_API_KEY, temperature=0.1)
-    elif model_choice == "gpt-4o":
-        return OpenAIChat(id=model_choice, api_key=OPENAI_API_KEY, temperature=0.1, top_p=0.9)
-    else:
-        return Claude(id="claude-3-5-haiku-20241022", api_key=ANTHROPIC_API_KEY, temperature=0.1)
+    if model_choice not in MODEL_FACTORIES:
+        model_choice = DEFAULT_MODEL
+    return MODEL_FACTORIES[model_choice](model_choice)
+
+@st.cache_resource(show_spinner=False)
+def get_model(model_choice: str):
+    # One configured model (and SDK client) per choice, shared by every agent factory.
+    return create_model(model_choice)
+
+@st.cache_resource(show_spinner=False)
+def get_search_tools():
+    from tools.concurrent_duckduckgo import ConcurrentDuckDuckGoTools
+
+    # Toolkits are stateless wrappers, so one instance serves every agent and model.
+    return ConcurrentDuckDuckGoTools(search=True, news=True)
+
+@st.cache_resource(show_spinner=False)
+def get_finance_tools(stock_fundamentals: bool = False):
+    from tools.cached_yfinance import CachedYFinanceTools
+
+    return CachedYFinanceTools(stock_price=True, analyst_recommendations=True, stock_fundamentals=stock_fundamentals)
 
 def create_web_search_agent(model):
+    from agno.agent import Agent
+
     return Agent(
         name="Web Search Agent",
         model=model,
-        tools=[DuckDuckGoTools(search=True, news=True)],
-        show_tool_calls=True,
-        instructions=dedent("""\
-        You are an experienced web researcher and news analyst! 🔍
-
-            Follow these steps when searching for information:
-            1. Start with the most recent and relevant sources
-            2. Cross-reference information from multiple sources
-            3. Prioritize reputable news outlets and official sources
-            4. Always cite your sources with links
-            5. Focus on market-moving news and significant developments
-    
-            Your style guide:
-            - Present information in a clear, journalistic style
-            - Use bullet points for key takeaways
-            - Include relevant quotes when available
-            - Specify the date and time for each piece of news
-            - Highlight market sentiment and industry trends
-            - End with a brief analysis of the overall narrative
-            - Pay special attention to regulatory news, earnings reports, and strategic announcements\
-                Extract up-to-date financial news and data from reliable sources.
-                Return results as clear bullet points.
-                If no data is found, state "No data found."\
-        """),
-        add_datetime_to_instructions=True,
-        markdown=True
+        tools=[get_search_tools()],
+        show_tool_calls=False,
+        instructions=WEB_SEARCH_INSTRUCTIONS,
+        add_datetime_to_instructions=False,
+        # Output only feeds the team agent's context, which does its own formatting.
+        markdown=False
     )
 
 def create_finance_agent(model):
+    from agno.agent import Agent
+
     return Agent(
         name="Finance Agent",
         model=model,
-        tools=[YFinanceTools(stock_price=True, analyst_recommendations=True)],
-        show_tool_calls=True,
-        instructions=dedent("""\
-            You are a seasoned Wall Street analyst with deep expertise in market analysis! 📊
-    
-            Follow these steps for comprehensive financial analysis:
-            1. Market Overview
-               - Latest stock price
-               - 52-week high and low
-            2. Financial Deep Dive
-               - Key metrics (P/E, Market Cap, EPS)
-            3. Professional Insights
-               - Analyst recommendations breakdown
-               - Recent rating changes
-    
-            4. Market Context
-               - Industry trends and positioning
-               - Competitive analysis
-               - Market sentiment indicators
-    
-            Your reporting style:
-            - Begin with an executive summary
-            - Use tables for data presentation
-            - Include clear section headers
-            - Add emoji indicators for trends (📈 📉)
-            - Highlight key insights with bullet points
-            - Compare metrics to industry averages
-            - Include technical term explanations
-            - End with a forward-looking analysis
-    
-            Risk Disclosure:
-            - Always highlight potential risk factors
-            - Note market uncertainties
-            - Mention relevant regulatory concerns
-            
-            STRICT FORMATTING RULES:
-            - For cryptocurrencies: Use format "CRYPTO: [SYMBOL] | PRICE: $[value] | CHANGE: [24h change]%"
-            - For stocks: Use format "STOCK: [SYMBOL] | PRICE: $[value] | CHANGE: [24h change]%"
-            - Never modify numerical values.
-            - On invalid symbols or missing data, return "No valid data found".\
-        """),
-        add_datetime_to_instructions=True,
-        markdown=True
+        tools=[get_finance_tools()],
+        show_tool_calls=False,
+        instructions=FINANCE_INSTRUCTIONS,
+        add_datetime_to_instructions=False,
+        # Output only feeds the team agent's context, which does its own formatting.
+        markdown=False
     )
 
 def create_team_agent(model, mode="analysis", model_choice=""):
+    from agno.agent import Agent
+
     if mode == "news":
-        instructions = dedent("""\
-        You are a skilled financial analyst with expertise in market data! 
-
-        Follow these steps when analyzing financial data:
-        1. Start with the latest stock price, trading volume, and daily range
-        2. Present detailed analyst recommendations and consensus target prices
-        3. Include key metrics: P/E ratio, market cap, 52-week range
-        4. Analyze trading patterns and volume trends
-        5. Compare performance against relevant sector indices
-
-        Your style guide:
-        - Use tables for structured data presentation
-        - Include clear headers for each data section
-        - Add brief explanations for technical terms
-        - Highlight notable changes with emojis (📈 📉)
-        - Use bullet points for quick insights
-        - Compare current values with historical averages
-        - End with a data-driven financial outlook
-        
-        Synthesize the provided news data into a concise, accurate news summary.
-            Response Template:
-            # Financial News Summary
-            {news_summary}
-            Market Watch Team, {date}\
-        """)
+        instructions = NEWS_TEAM_INSTRUCTIONS
+    elif model_choice.lower() == "gpt-4o":
+        instructions = ANALYSIS_TEAM_INSTRUCTIONS_WEB_FALLBACK
     else:
-        # For GPT-4o, if YFinance data is missing or incomplete, incorporate fallback web data.
-        extra_instruction = ""
-        if model_choice.lower() == "gpt-4o":
-            extra_instruction = "Note: If YFinance data is missing or incomplete, incorporate fallback data from web search."
-        instructions = dedent(f"""\
-            Synthesize data following these rules:
-            1. Use YFinance as the primary source.
-            2. Use web data as a fallback if YFinance data is missing or incomplete.
-            3. Flag any price discrepancies >2% as warnings.
-            4. Never modify numerical values.
-            {extra_instruction}
-            
-            Response Template:
-            # {{Ticker}} Analysis
-            ## Verified Data
-            - Price: ${{price}} (YFinance)
-            - 24h Change: {{change}}%
-            - Market Cap: ${{market_cap}}
-            ## Cross-Verification
-            {{web_data_summary}}
-            ## Data Quality
-            {{warnings}}
-            Market Watch Team, {{date}}
-        """)
+        instructions = ANALYSIS_TEAM_INSTRUCTIONS
     return Agent(
         name="Team Agent",
         model=model,
         instructions=instructions,
         show_tool_calls=False,
-        add_datetime_to_instructions=True,
+        add_datetime_to_instructions=False,
         markdown=True,
     )
 
-def resolve_ticker(query: str) -> str:
-    # Refine ticker resolution: first, try exact mapping; then check if a known asset is mentioned.
-    query = query.strip().upper()
-    if query in ASSET_MAPPING:
-        return ASSET_MAPPING[query]
-    for key, value in ASSET_MAPPING.items():
-        if key in query:
-            return value
-    # Fallback: remove non-alphanumeric characters and assume it's the ticker.
-    cleaned = re.sub(r'[^A-Z0-9-]', '', query)
-    return cleaned
-
-def extract_price(data: str) -> float:
-    # Try extracting from crypto format
-    crypto_match = re.search(r'CRYPTO: \S+ \| PRICE: \$(\d+[\d,\.]*)', data)
-    if crypto_match:
-        try:
-            return float(crypto_match.group(1).replace(",", ""))
-        except:
-            pass
-    # Try stock format
-    stock_match = re.search(r'STOCK: \S+ \| PRICE: \$(\d+[\d,\.]*)', data)
-    if stock_match:
-        try:
-            return float(stock_match.group(1).replace(",", ""))
-        except:
-            pass
-    # Generic price extraction
-    price_matches = re.findall(r'\$(\d+[\d,\.]*)', data)
-    if price_matches:
-        try:
-            return max(float(p.replace(",", "")) for p in price_matches)
-        except:
-            pass
-    return None
+def create_unified_agent(model):
+    from agno.agent import Agent
 
-def retrieve_financial_data(query: str, agent: Agent) -> str:
-    resolved_symbol = resolve_ticker(query)
+    return Agent(
+        name="Unified Agent",
+        model=model,
+        tools=[get_finance_tools(stock_fundamentals=True), get_search_tools()],
+        show_tool_calls=False,
+        instructions=UNIFIED_INSTRUCTIONS,
+        add_datetime_to_instructions=False,
+        markdown=True,
+    )
+
+def get_unified_agent(model_choice: str):
+    # Fast mode: one agent calls both tools inline, saving two LLM round-trips.
+    # Built per query like create_agents, so concurrent sessions never share run state.
+    return create_unified_agent(copy.copy(get_model(model_choice)))
+
+def create_agents(model_choice: str):
+    # Agents keep per-run state (run id, response, memory) on themselves, so queries
+    # from concurrent sessions on the shared loop each get a fresh set. Construction
+    # is cheap: the model, SDK clients and toolkits are cached resources.
+    # Agents register their tools on the model they run with, so each one gets a
+    # shallow copy: configuration and SDK client are shared, tool state is not.
+    model = get_model(model_choice)
+    web_agent = create_web_search_agent(copy.copy(model))
+    finance_agent = create_finance_agent(copy.copy(model))
+    team_agent_analysis = create_team_agent(copy.copy(model), mode="analysis", model_choice=model_choice)
+    team_agent_news = create_team_agent(copy.copy(model), mode="news", model_choice=model_choice)
+    return web_agent, finance_agent, team_agent_analysis, team_agent_news
+
+@st.cache_resource(show_spinner=False)
+def get_llm_semaphore(limit: int) -> threading.BoundedSemaphore:
+    # Gates the synchronous streamed team calls made from each session's script thread.
+    return threading.BoundedSemaphore(limit)
+
+@st.cache_resource(show_spinner=False)
+def get_async_llm_semaphore(limit: int) -> asyncio.Semaphore:
+    # Gates the retrieval agents' arun calls, which all run on the shared loop: waiters
+    # queue there in FIFO order without holding a thread, and script threads blocked
+    # on the threading semaphore cannot jump ahead of them.
+    return asyncio.Semaphore(limit)
+
+@st.cache_resource(show_spinner=False)
+def get_executor() -> ThreadPoolExecutor:
+    # Shared by all sessions for blocking work awaited from async code, so it
+    # never stalls the shared event loop.
+    return ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4), thread_name_prefix="agent-io")
+
+async def run_blocking(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), func, *args)
+
+async def arun_limited(agent: Agent, prompt: str):
+    async with get_async_llm_semaphore(LLM_MAX_CONCURRENCY):
+        return await agent.arun(prompt)
+
+@st.cache_resource(show_spinner=False)
+def get_response_cache() -> TTLCache:
+    # Identical prompts within 5 minutes are answered without re-running the agents.
+    return TTLCache(ttl=300)
+
+@st.cache_resource(show_spinner=False)
+def get_retrieval_cache() -> TTLCache:
+    # Shared by prices, web results, analyses and news summaries; each entry is
+    # stored with its own TTL so the expiry sweep does not drop the longer-lived ones.
+    return TTLCache(ttl=PRICE_CACHE_TTL)
+
+def response_cache_key(query: str, model_choice: str, fast_mode: bool, cross_validate: bool) -> tuple:
+    """Return the (key, ttl) under which main caches the answer; a None ttl is the cache default."""
+    # Analysis answers mirror process_query's per-symbol-set key and its short TTL, so
+    # they are reused only as long as the prices they quote. News and fast-mode
+    # answers depend on the wording, so they are keyed on the normalized text.
+    if fast_mode or is_news_query(query):
+        return (model_choice, fast_mode, cross_validate, " ".join(query.lower().split())), None
+    return (model_choice, fast_mode, cross_validate, "analysis", symbol_key(query)), ANALYSIS_CACHE_TTL
+
+def retrieval_cache_key(agent: Agent, prompt: str) -> str:
+    normalized = " ".join(prompt.lower().split())
+    return hashlib.md5(f"{agent.name}|{agent.model.id}|{normalized}".encode()).hexdigest()
+
+@st.cache_resource(show_spinner=False)
+def get_inflight_queries() -> SingleFlight:
+    # Identical queries submitted while one is still running wait for its result.
+    return SingleFlight()
+
+@st.cache_resource(show_spinner=False)
+def get_inflight_retrievals() -> dict:
+    # Only touched from the shared event loop's thread, so no lock is needed.
+    return {}
+
+async def arun_coalesced(agent: Agent, prompt: str, key: str):
+    """Run the agent, or await the identical call already in flight under key."""
+    # Finance prompts are normalized to the resolved symbols, so phrasings like
+    # "BTC price" and "btc analysis" share a key here even though the query-level
+    # SingleFlight sees them as different. Web prompts embed the raw query, so only
+    # identical wording (up to case and whitespace) coalesces for them.
+    inflight = get_inflight_retrievals()
+    task = inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(arun_limited(agent, prompt))
+        inflight[key] = task
+        task.add_done_callback(lambda _: inflight.pop(key, None))
+    # Shielded so one cancelled waiter does not cancel the call for the others.
+    return await asyncio.shield(task)
+
+async def quote_symbols(symbols: tuple) -> str:
+    """Build the finance agent's tagged output directly from YFinance, or None if any lookup fails."""
+    tools = get_finance_tools()
+    lookups = [run_blocking(tools.get_price_line, symbol) for symbol in symbols]
+    # Analyst recommendations only exist for single stocks; fetch them alongside the quote.
+    with_recommendations = len(symbols) == 1 and not symbols[0].endswith("-USD")
+    if with_recommendations:
+        lookups.append(run_blocking(tools.get_analyst_recommendations, symbols[0]))
+    results = await asyncio.gather(*lookups, return_exceptions=True)
+    lines = results[:len(symbols)]
+    if not all(isinstance(line, str) and line.startswith(("CRYPTO: ", "STOCK: ")) for line in lines):
+        return None
+    if with_recommendations:
+        recommendations = results[-1]
+        if isinstance(recommendations, str) and not recommendations.startswith(("Error", "Could not")):
+            lines.append(f"Analyst Recommendations: {recommendations}")
+    return "\n".join(lines)
+
+async def retrieve_financial_data(query: str, agent: Agent) -> str:
+    # Comparisons name several known assets; ask for all of them so the agent can
+    # use the batched price tool instead of one lookup per symbol.
+    symbols = find_assets(query)
+    if len(symbols) <= 1:
+        symbols = (resolve_ticker(query),)
+    if len(symbols) > 1:
+        prompt = f"Get prices for {', '.join(symbols)}"
+    else:
+        prompt = f"Get price for {symbols[0]}"
+    cache = get_retrieval_cache()
+    cache_key = retrieval_cache_key(agent, prompt)
+    cached = cache.get(cache_key, ttl=PRICE_CACHE_TTL)
+    if cached is not None:
+        return cached
+    # The finance agent only reformats tool output, so quote the symbols directly
+    # and skip its LLM round-trip; the agent remains the fallback.
+    if all(symbols):
+        quoted = await quote_symbols(symbols)
+        if quoted:
+            cache.set(cache_key, quoted)
+            return quoted
     try:
-        response = agent.run(f"Get price for {resolved_symbol}")
+        response = await arun_coalesced(agent, prompt, cache_key)
         if "PRICE: $" not in response.content:
             raise ValueError("Invalid price format")
+        cache.set(cache_key, response.content)
         return response.content
     except Exception as e:
         logger.error(f"YFinance retrieval failed for {query}: {str(e)}")
         return "No valid data found"
 
-def retrieve_web_data(query: str, agent: Agent) -> str:
+async def retrieve_web_data(query: str, agent: Agent, today: str) -> str:
+    # The date goes in the user message, not the system prompt, so the cached
+    # instruction prefix stays byte-identical between calls.
+    prompt = f"Extract news and financial data for {query}\nCurrent Date: {today}"
+    cache = get_retrieval_cache()
+    cache_key = retrieval_cache_key(agent, prompt)
+    cached = cache.get(cache_key, ttl=NEWS_CACHE_TTL)
+    if cached is not None:
+        return cached
     try:
-        response = agent.run(f"Extract news and financial data for {query}")
-        return response.content or "No data found."
-    except Exception as e:
+        response = await arun_coalesced(agent, prompt, cache_key)
+        # Empty results are not cached, so the query is retried on the next click.
+        if not response.content or response.content.strip() == "No data found.":
+            return "No data found."
+        cache.set(cache_key, response.content, ttl=NEWS_CACHE_TTL)
+        return response.content
+    except Exception:
         logger.error("Web data error", exc_info=True)
         return "No data found."
 
-def process_query(query: str, web_agent: Agent, finance_agent: Agent, team_agent_analysis: Agent, team_agent_news: Agent) -> str:
-    if not query.strip():
-        return "Please enter a valid query."
-    
-    query_lower = query.lower()
-    # Classify query type: if it contains news-related keywords, use news mode.
-    if any(keyword in query_lower for keyword in ["news", "trends", "headlines"]):
-        web_data = retrieve_web_data(query, web_agent)
-        context = f"News Data: {web_data}\nCurrent Date: {datetime.now().strftime('%Y-%m-%d')}"
-        try:
-            result = team_agent_news.run(context)
-            return result.content
-        except Exception as e:
-            logger.error("News analysis error", exc_info=True)
-            return "News analysis unavailable."
-    else:
-        # For ticker-based financial analysis:
-        finance_data = retrieve_financial_data(query, finance_agent)
-        # Fallback: if YFinance returns no valid data, use web search data instead.
+async def retrieve_context(query: str, web_agent: Agent, finance_agent: Agent, today: str, cross_validate: bool = True) -> str:
+    """
+    Gather the retrieval data for an analysis query and return the team agent context,
+    or None when neither YFinance nor web search found anything.
+    """
+    if not cross_validate:
+        # Only touch web search when YFinance has nothing usable.
+        finance_data = await retrieve_financial_data(query, finance_agent)
         if "No valid data found" in finance_data:
-            web_data_fallback = retrieve_web_data(query, web_agent)
-            finance_data = web_data_fallback
-        
-        # Attempt to extract prices from the chosen finance data and an extra web lookup.
-        web_price = extract_price(finance_data)
-        web_data_extra = retrieve_web_data(query, web_agent)
-        web_price_extra = extract_price(web_data_extra)
-        
-        validation = ""
-        if web_price and web_price_extra:
-            diff = abs(web_price - web_price_extra) / web_price if web_price != 0 else 0
-            if diff > 0.02:
-                validation = f"Warning: Price discrepancy detected ({diff:.2%})"
-        
-        context = f"Web Data: {web_data_extra}\nFinance Data: {finance_data}\nValidation Notes: {validation}\nCurrent Date: {datetime.now().strftime('%Y-%m-%d')}"
-        try:
-            result = team_agent_analysis.run(context)
-            return result.content
-        except Exception as e:
-            logger.error("Financial analysis error", exc_info=True)
-            return "Financial analysis unavailable."
+            finance_data = await retrieve_web_data(query, web_agent, today)
+            if finance_data.strip() == "No data found.":
+                return None
+        context = f"Web Data: Cross-verification disabled\nFinance Data: {finance_data}\nValidation Notes: \nCurrent Date: {today}"
+        return context
+
+    # For ticker-based financial analysis: the YFinance and web lookups are
+    # independent, so run both round-trips concurrently.
+    finance_data, web_data_extra = await asyncio.gather(
+        retrieve_financial_data(query, finance_agent),
+        retrieve_web_data(query, web_agent, today),
+    )
+    # Fallback: if YFinance returns no valid data, use web search data instead.
+    if "No valid data found" in finance_data:
+        if web_data_extra.strip() == "No data found.":
+            return None
+        finance_data = web_data_extra
+    
+    # Attempt to extract prices from the chosen finance data and the web lookup.
+    web_price = extract_price(finance_data)
+    web_price_extra = extract_price(web_data_extra)
+    
+    validation = ""
+    if web_price and web_price_extra:
+        diff = abs(web_price - web_price_extra) / web_price if web_price != 0 else 0
+        if diff > 0.02:
+            validation = f"Warning: Price discrepancy detected ({diff:.2%})"
+    
+    context = f"Web Data: {web_data_extra}\nFinance Data: {finance_data}\nValidation Notes: {validation}\nCurrent Date: {today}"
+    return context
+
+def stream_team_response(team_agent: Agent, context: str, fallback: str):
+    """Yield the team agent's answer as it is generated, in small time-batched pieces."""
+    semaphore = get_llm_semaphore(LLM_MAX_CONCURRENCY)
+    semaphore.acquire()
+    pending = []
+    emitted = False
+    try:
+        flushed_at = time.monotonic()
+        for chunk in team_agent.run(context, stream=True):
+            if chunk.content:
+                pending.append(chunk.content)
+                now = time.monotonic()
+                if now - flushed_at >= STREAM_FLUSH_INTERVAL:
+                    yield "".join(pending)
+                    emitted = True
+                    pending.clear()
+                    flushed_at = now
+        if pending:
+            yield "".join(pending)
+    except Exception:
+        logger.error(f"{team_agent.name} error", exc_info=True)
+        if pending:
+            yield "".join(pending)
+            emitted = True
+        # Keep the fallback last so callers can detect failure with endswith(fallback).
+        yield f"\n\n{fallback}" if emitted else fallback
+    finally:
+        semaphore.release()
+
+def run_async(coro):
+    # Blocks the calling script thread until the coroutine finishes on the shared loop.
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop()).result()
+
+def stream_and_cache(team_agent: Agent, context: str, fallback: str, cache_key: str = None, ttl: float = None):
+    """Stream the team agent's answer and, if it succeeded, store it under cache_key."""
+    chunks = []
+    for text in stream_team_response(team_agent, context, fallback):
+        chunks.append(text)
+        yield text
+    summary = "".join(chunks)
+    if cache_key and summary and not summary.endswith(fallback):
+        get_retrieval_cache().set(cache_key, summary, ttl=ttl)
+
+def process_query(query: str, web_agent: Agent, finance_agent: Agent, team_agent_analysis: Agent, team_agent_news: Agent, cross_validate: bool = True, now: datetime = None, on_stage=None):
+    # on_stage(label) is called as the pipeline moves between retrieval and synthesis.
+    on_stage = on_stage or (lambda label: None)
+    # Format the request date once so every prompt (and the caller's caption) agree.
+    today = (now or datetime.now()).strftime('%Y-%m-%d')
+    if is_news_query(query):
+        yield from process_news_query(query, web_agent, team_agent_news, today, on_stage)
+        return
 
-def setup_streamlit_ui() -> str:
+    # Phrasings of the same request ("BTC price", "btc analysis") resolve to the same
+    # symbols and the report template is per symbol set, so they share a short-lived entry.
+    cache_key = f"analysis::{team_agent_analysis.model.id}::{cross_validate}::{symbol_key(query)}"
+    analysis = get_retrieval_cache().get(cache_key, ttl=ANALYSIS_CACHE_TTL)
+    if analysis is not None:
+        yield analysis
+        return
+
+    on_stage("Fetching market data and web results..." if cross_validate else "Fetching market data...")
+    context = run_async(retrieve_context(query, web_agent, finance_agent, today, cross_validate))
+    if context is None:
+        # Nothing for the team agent to synthesize; answer locally instead of spending an LLM call.
+        yield INSUFFICIENT_DATA_MESSAGE
+        return
+    on_stage("Synthesizing analysis...")
+    yield from stream_and_cache(team_agent_analysis, context, "Financial analysis unavailable.", cache_key, ANALYSIS_CACHE_TTL)
+
+def process_news_query(query: str, web_agent: Agent, team_agent_news: Agent, today: str, on_stage=None):
+    on_stage = on_stage or (lambda label: None)
+    has_entity = names_entity(query)
+    # Check the topic-keyed summary before retrieval, so paraphrases of a cached
+    # request skip the web agent as well as the team agent.
+    cache_key = f"news::{team_agent_news.model.id}::{news_topic(query)}::{today}"
+    if has_entity:
+        summary = get_retrieval_cache().get(cache_key, ttl=NEWS_SUMMARY_TTL)
+        if summary is not None:
+            yield summary
+            return
+
+    on_stage("Searching the web for news...")
+    web_data = run_async(retrieve_web_data(query, web_agent, today))
+    if web_data.strip() == "No data found.":
+        # Nothing to summarize; answer locally instead of spending an LLM call.
+        yield INSUFFICIENT_DATA_MESSAGE
+        return
+    if not has_entity:
+        # No company or asset named: the web agent already returns summarized bullet points,
+        # so fill the news template locally instead of spending another LLM call.
+        yield NEWS_SUMMARY_TEMPLATE.substitute(news_summary=web_data, date=today)
+        return
+
+    on_stage("Summarizing news...")
+    context = f"News Data: {web_data}\nCurrent Date: {today}"
+    yield from stream_and_cache(team_agent_news, context, "News analysis unavailable.", cache_key, NEWS_SUMMARY_TTL)
+
+def setup_streamlit_ui() -> tuple:
     st.set_page_config(page_title="Financial Agent", page_icon="📈", layout="wide")
     st.title("📈 Financial Agent")
-    st.markdown("Enter your query to receive up-to-date, accurate financial analysis or news updates.")
+    st.markdown(INTRO_MD)
     
     with st.sidebar:
         st.header("Configuration")
-        model_choice = st.radio("Select AI Model:", ["claude-3-5-haiku-20241022", "gpt-4o"], index=0)
+        model_choice = st.radio("Select AI Model:", list(MODEL_FACTORIES), index=0)
+        fast_mode = st.toggle(
+            "Fast mode (single agent)",
+            value=False,
+            help="Answer with one agent that calls the tools directly. Faster, but skips the separate price cross-verification.",
+        )
+        cross_validate = st.toggle(
+            "Cross-verify prices with web search",
+            value=True,
+            help="Run an extra web lookup to check YFinance prices. Turning it off saves one agent call per analysis.",
+        )
         st.divider()
         st.subheader("Example Queries")
-        st.markdown("""
-        - **AAPL stock analysis:** Latest stock price and market analysis for Apple Inc.
-        - **Bitcoin trends:** Current trends in the cryptocurrency market.
-        - **Recent tech sector news:** Up-to-date news headlines on the tech sector.
-        """)
+        st.markdown(SIDEBAR_EXAMPLES_MD)
 
 
-    return model_choice
+    return model_choice, fast_mode, cross_validate
 
 def main():
     if not (ANTHROPIC_API_KEY or OPENAI_API_KEY):
         st.error("API keys missing! Check your environment variables.")
         return
 
-    model_choice = setup_streamlit_ui()
+    model_choice, fast_mode, cross_validate = setup_streamlit_ui()
     query = st.text_input("Enter financial query:", placeholder="e.g., TSLA stock analysis or tech sector news")
     analyze_clicked = st.button("Run Analysis", type="primary")
     
     if analyze_clicked and query:
-        with st.spinner("Running analysis..."):
-            try:
-                model = create_model(model_choice)
-                web_agent = create_web_search_agent(model)
-                finance_agent = create_finance_agent(model)
-                team_agent_analysis = create_team_agent(model, mode="analysis", model_choice=model_choice)
-                team_agent_news = create_team_agent(model, mode="news", model_choice=model_choice)
-                result = process_query(query, web_agent, finance_agent, team_agent_analysis, team_agent_news)
-                st.markdown(f"**Validated Analysis** ({model_choice})")
+        # Reject blank input before any model or agent is built.
+        if not query.strip():
+            st.warning("Please enter a valid query.")
+            return
+        # A status box instead of a spinner, so the user can see which stage is running.
+        status = st.status("Running analysis...")
+        on_stage = lambda label: status.update(label=label)
+        now = datetime.now()
+        try:
+            response_cache = get_response_cache()
+            cache_key, cache_ttl = response_cache_key(query, model_choice, fast_mode, cross_validate)
+            st.markdown(f"**Validated Analysis** ({model_choice})")
+            result = response_cache.get(cache_key)
+            if result is not None:
                 st.markdown(result)
-                st.caption(f"Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-            except Exception as e:
-                st.error("Analysis engine unavailable. Please try again later.")
-                logger.error(f"Main execution error: {str(e)}", exc_info=True)
+            else:
+                inflight = get_inflight_queries()
+                flight, is_leader = inflight.claim(cache_key)
+                if not is_leader:
+                    on_stage("Waiting for an identical query already running...")
+                    # Re-raises the leader's error, if it failed.
+                    result = flight.result(timeout=300)
+                    if result is None:
+                        raise RuntimeError("Identical in-flight query produced no result")
+                    st.markdown(result)
+                else:
+                    # Resolve in finally so waiters are released even if the
+                    # leader's script run is interrupted by a Streamlit rerun.
+                    error = None
+                    try:
+                        if fast_mode:
+                            on_stage("Running unified agent...")
+                            result = st.write_stream(stream_team_response(get_unified_agent(model_choice), f"{query}\nCurrent Date: {now.strftime('%Y-%m-%d')}", "Financial analysis unavailable."))
+                        else:
+                            web_agent, finance_agent, team_agent_analysis, team_agent_news = create_agents(model_choice)
+                            result = st.write_stream(process_query(query, web_agent, finance_agent, team_agent_analysis, team_agent_news, cross_validate, now, on_stage))
+                    except BaseException as e:
+                        # Streamlit stops and reruns scripts with control-flow exceptions;
+                        # waiters in other sessions get a plain error instead of those.
+                        error = e if isinstance(e, Exception) else RuntimeError("Identical in-flight query was interrupted")
+                        raise
+                    finally:
+                        inflight.resolve(cache_key, result, error)
+                    if result and not result.endswith(("News analysis unavailable.", "Financial analysis unavailable.", INSUFFICIENT_DATA_MESSAGE)):
+                        response_cache.set(cache_key, result, ttl=cache_ttl)
+            status.update(label="Analysis complete", state="complete")
+            st.caption(f"Last updated: {now.strftime('%Y-%m-%d %H:%M:%S')}")
+        except Exception as e:
+            status.update(label="Analysis failed", state="error")
+            st.error("Analysis engine unavailable. Please try again later.")
+            logger.error(f"Main execution error: {str(e)}", exc_info=True)
 
 if __name__ == "__main__":
     main()
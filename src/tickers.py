@@ -0,0 +1,132 @@
+import re
+from types import MappingProxyType
+from functools import lru_cache
+
+# Asset mapping for ticker resolution: canonical symbols plus name aliases,
+# expanded once at import time into a read-only view.
+_BASE_ASSETS = {
+    "SOL": "SOL-USD",
+    "BTC": "BTC-USD",
+    "ETH": "ETH-USD",
+    "AAPL": "AAPL",
+    "TSLA": "TSLA",
+    "NVDA": "NVDA",
+}
+_ASSET_ALIASES = {
+    "BITCOIN": "BTC",
+    "ETHEREUM": "ETH",
+    "SOLANA": "SOL",
+    "APPLE": "AAPL",
+    "TESLA": "TSLA",
+    "NVIDIA": "NVDA",
+}
+ASSET_MAPPING = MappingProxyType({
+    **_BASE_ASSETS,
+    **{alias: _BASE_ASSETS[symbol] for alias, symbol in _ASSET_ALIASES.items()},
+})
+
+# Precompiled patterns for ticker resolution and price extraction
+_PRICE_MARKER = " | PRICE: $"
+_AMOUNT_RE = re.compile(r'\d+[\d,\.]*')
+_DOLLAR_RE = re.compile(r'\$(\d+[\d,\.]*)')
+_TICKER_CLEAN_RE = re.compile(r'[^A-Z0-9-]')
+_COMMA_TABLE = str.maketrans('', '', ',')
+# Longest keys first so the alternation prefers the most specific asset
+_ASSET_RE = re.compile(r'\b(' + '|'.join(re.escape(k) for k in sorted(ASSET_MAPPING, key=len, reverse=True)) + r')\b')
+
+
+@lru_cache(maxsize=512)
+def resolve_ticker(query: str) -> str:
+    # Refine ticker resolution: first, try exact mapping; then check if a known asset is mentioned.
+    query = query.strip().upper()
+    if query in ASSET_MAPPING:
+        return ASSET_MAPPING[query]
+    # Whole-word match only, so e.g. "SOLAR" does not resolve to SOL.
+    match = _ASSET_RE.search(query)
+    if match:
+        return ASSET_MAPPING[match.group(1)]
+    # Fallback: remove non-alphanumeric characters and assume it's the ticker.
+    cleaned = _TICKER_CLEAN_RE.sub('', query)
+    return cleaned
+
+@lru_cache(maxsize=512)
+def find_assets(query: str) -> tuple:
+    # Known assets mentioned in the query, as mapped symbols in first-seen order.
+    return tuple(dict.fromkeys(ASSET_MAPPING[key] for key in _ASSET_RE.findall(query.upper())))
+
+def symbol_key(query: str) -> str:
+    # Every known asset in the query, so a comparison ("AAPL vs TSLA") never shares
+    # a key with a single-ticker query ("AAPL stock").
+    return ",".join(find_assets(query)) or resolve_ticker(query)
+
+# Query classification: whole-word news keywords select news mode, and filler
+# words are dropped from the news topic key
+_WORD_RE = re.compile(r'[a-z0-9]+')
+_NEWS_KEYWORDS = frozenset({"news", "trend", "trends", "headline", "headlines"})
+NEWS_FILLER_WORDS = frozenset({
+    "news", "trend", "trends", "headline", "headlines", "latest", "recent", "today", "the", "on", "in", "for",
+    "about", "of", "and", "a", "an", "any", "what", "whats", "is", "are", "me", "show", "give",
+})
+
+def is_news_query(query: str) -> bool:
+    return not _NEWS_KEYWORDS.isdisjoint(_WORD_RE.findall(query.lower()))
+
+def news_topic(query: str) -> str:
+    # Coarse cache key: "Latest tech news" and "tech news" share one summary, and
+    # asset names fold into their symbol, so "News about Apple AAPL" matches "AAPL news".
+    words = {ASSET_MAPPING.get(w.upper(), w) for w in _WORD_RE.findall(query.lower()) if w not in NEWS_FILLER_WORDS}
+    return " ".join(sorted(words))
+
+# Topic words that name a market segment rather than a company or asset
+_GENERIC_TOPIC_WORDS = frozenset({
+    "market", "markets", "stock", "stocks", "equity", "equities", "sector", "sectors", "industry",
+    "tech", "technology", "crypto", "cryptocurrency", "cryptocurrencies", "financial", "finance",
+    "economy", "economic", "business", "global", "world", "us", "wall", "street", "energy",
+    "healthcare", "bank", "banks", "banking", "earnings", "ipo", "ipos", "inflation", "fed", "rates",
+    "interest", "bond", "bonds", "commodities", "oil", "gold", "forex", "currency", "currencies",
+    "semiconductor", "semiconductors", "ai", "retail", "top", "major", "this", "week", "daily", "weekly",
+})
+
+def names_entity(query: str) -> bool:
+    # Any topic word that is not a generic market term may be a company or ticker
+    # ("MSFT news", "Amazon earnings news"); only queries made of generic terms
+    # ("tech sector news") name no entity.
+    return not _GENERIC_TOPIC_WORDS.issuperset(news_topic(query).split())
+
+def _tagged_amount(data: str, tag: str) -> str:
+    # Equivalent to re.search(tag + r' \S+ \| PRICE: \$(\d+[\d,\.]*)'), but uses
+    # str.find to jump between fixed literals instead of running the regex engine.
+    start = data.find(tag)
+    while start >= 0:
+        symbol_start = start + len(tag)
+        marker = data.find(_PRICE_MARKER, symbol_start)
+        if marker < 0:
+            return None
+        symbol = data[symbol_start:marker]
+        # Only the first marker can match: any later one would put whitespace in the symbol.
+        if symbol.split() == [symbol]:
+            match = _AMOUNT_RE.match(data, marker + len(_PRICE_MARKER))
+            if match:
+                return match.group()
+        start = data.find(tag, start + 1)
+    return None
+
+def extract_price(data: str) -> float:
+    # Try the strict crypto format first, then the stock format
+    for tag in ("CRYPTO: ", "STOCK: "):
+        amount = _tagged_amount(data, tag)
+        if amount:
+            try:
+                return float(amount.translate(_COMMA_TABLE))
+            except ValueError:
+                pass
+    # Generic price extraction: largest parseable dollar amount, without building a list
+    best = None
+    for match in _DOLLAR_RE.finditer(data):
+        try:
+            value = float(match.group(1).translate(_COMMA_TABLE))
+        except ValueError:
+            continue
+        if best is None or value > best:
+            best = value
+    return best
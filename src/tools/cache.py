@@ -0,0 +1,137 @@
+import os
+import json
+import time
+import threading
+import logging
+from collections import OrderedDict
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.getenv("FIN_AGENT_CACHE_DIR", ".cache")
+
+
+class FileCache:
+    """
+    Persistent JSON cache stored under {cache_dir}/{ticker}/{endpoint}.json, with a
+    small in-process LRU in front so warm lookups skip the disk read and JSON parse.
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR, memory_size: int = 128):
+        self.cache_dir = cache_dir
+        self.memory_size = memory_size
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, ticker: str, endpoint: str) -> str:
+        return os.path.join(self.cache_dir, ticker.upper(), f"{endpoint}.json")
+
+    def _remember(self, path: str, entry: dict) -> None:
+        with self._lock:
+            self._memory[path] = entry
+            self._memory.move_to_end(path)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    def get(self, ticker: str, endpoint: str, ttl: float):
+        path = self._path(ticker, endpoint)
+        with self._lock:
+            entry = self._memory.get(path)
+            if entry is not None:
+                self._memory.move_to_end(path)
+        if entry is None:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                return None
+            self._remember(path, entry)
+        if time.time() - entry.get("ts", 0) > ttl:
+            return None
+        return entry.get("data")
+
+    def set(self, ticker: str, endpoint: str, data) -> None:
+        path = self._path(ticker, endpoint)
+        entry = {"ts": time.time(), "data": data}
+        self._remember(path, entry)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Cache write failed for {ticker}/{endpoint}: {str(e)}")
+
+
+class TTLCache:
+    """
+    Thread-safe in-memory LRU cache whose entries expire after a TTL in seconds.
+    Expired entries are swept on every set and the least recently used entries are
+    evicted beyond maxsize, so the cache stays bounded for the life of the process.
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, ttl: float = None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            ts, entry_ttl, value = entry
+            if time.time() - ts > (entry_ttl if ttl is None else ttl):
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: float = None) -> None:
+        """Store value; ttl overrides the cache default for this entry's expiry sweep."""
+        now = time.time()
+        with self._lock:
+            self._sweep(now)
+            self._data[key] = (now, self.ttl if ttl is None else ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def _sweep(self, now: float) -> None:
+        expired = [key for key, (ts, ttl, _) in self._data.items() if now - ts > ttl]
+        for key in expired:
+            del self._data[key]
+
+
+class SingleFlight:
+    """Coalesces concurrent work for the same key: the first caller computes, the rest wait."""
+
+    def __init__(self):
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def claim(self, key) -> tuple:
+        """Return (future, is_leader); only the leader should do the work and resolve it."""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future, False
+            future = Future()
+            self._inflight[key] = future
+            return future, True
+
+    def resolve(self, key, result=None, error: BaseException = None) -> None:
+        with self._lock:
+            future = self._inflight.pop(key, None)
+        if future is None:
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
@@ -0,0 +1,193 @@
+import json
+from datetime import datetime, time, timedelta
+from typing import List
+from zoneinfo import ZoneInfo
+
+from agno.tools.yfinance import YFinanceTools
+
+from tools.cache import FileCache
+
+PRICE_TTL = 15 * 60
+# Yahoo serves at most this many symbols per batched request
+MAX_BATCH_SYMBOLS = 20
+FUNDAMENTALS_TTL = 24 * 60 * 60
+
+# US equity session. Holidays and half-days are treated as regular sessions; the
+# computed close is never earlier than the real one, so this only costs refetches.
+MARKET_TZ = ZoneInfo("America/New_York")
+MARKET_OPEN = time(9, 30)
+MARKET_CLOSE = time(16, 0)
+
+
+def seconds_since_market_close(now: datetime = None):
+    """Return seconds since the last US equity session closed, or None while the market is open."""
+    now = now or datetime.now(MARKET_TZ)
+    is_weekday = now.weekday() < 5
+    if is_weekday and MARKET_OPEN <= now.time() < MARKET_CLOSE:
+        return None
+    close = now.replace(hour=MARKET_CLOSE.hour, minute=MARKET_CLOSE.minute, second=0, microsecond=0)
+    if not is_weekday or now.time() < MARKET_CLOSE:
+        close -= timedelta(days=1)
+        while close.weekday() >= 5:
+            close -= timedelta(days=1)
+    # Subtracting aware datetimes in one zone gives wall-clock time; compare
+    # timestamps so a DST change over the weekend is counted.
+    return now.timestamp() - close.timestamp()
+
+
+class CachedYFinanceTools(YFinanceTools):
+    """YFinanceTools that memoizes results per (ticker, endpoint) in a FileCache."""
+
+    def __init__(self, cache: FileCache = None, price_ttl: float = PRICE_TTL, fundamentals_ttl: float = FUNDAMENTALS_TTL, **kwargs):
+        self.cache = cache or FileCache()
+        self.price_ttl = price_ttl
+        self.fundamentals_ttl = fundamentals_ttl
+        super().__init__(**kwargs)
+        if kwargs.get("stock_price", True):
+            self.register(self.get_current_stock_prices)
+
+    def _cached(self, symbol: str, endpoint: str, ttl: float, fetch) -> str:
+        data = self.cache.get(symbol, endpoint, ttl)
+        if data is not None:
+            return data
+        data = fetch(symbol)
+        # Only successful lookups are cached; error strings should be retried.
+        if data and not data.startswith(("Error", "Could not")):
+            self.cache.set(symbol, endpoint, data)
+        return data
+
+    def get_current_stock_price(self, symbol: str) -> str:
+        """
+        Use this function to get the current stock price for a given symbol.
+
+        Args:
+            symbol (str): The stock symbol.
+
+        Returns:
+            str: The current stock price or error message.
+        """
+        return self._cached(symbol, "stock_price", self._price_ttl(symbol), self._fetch_current_price)
+
+    def _fetch_current_price(self, symbol: str) -> str:
+        import yfinance as yf
+
+        # fast_info reads the light chart endpoint; the base toolkit's Ticker.info
+        # pulls the full quote summary just to read one field.
+        try:
+            price = yf.Ticker(symbol).fast_info.last_price
+        except Exception as e:
+            return f"Error fetching current price for {symbol}: {str(e)}"
+        return f"{price:.4f}" if price else f"Could not fetch current price for {symbol}"
+
+    def get_price_line(self, symbol: str) -> str:
+        """
+        Return the finance agent's tagged quote line for a symbol, built straight from
+        YFinance so callers can skip the agent's LLM round-trip. Not registered as a tool.
+        """
+        symbol = symbol.upper()
+        return self._cached(symbol, "price_line", self._price_ttl(symbol), self._fetch_price_line)
+
+    def _fetch_price_line(self, symbol: str) -> str:
+        import yfinance as yf
+
+        try:
+            info = yf.Ticker(symbol).fast_info
+            price = info.last_price
+            previous_close = info.previous_close
+        except Exception as e:
+            return f"Error fetching current price for {symbol}: {str(e)}"
+        if not price:
+            return f"Could not fetch current price for {symbol}"
+
+        kind = "CRYPTO" if symbol.endswith("-USD") else "STOCK"
+        line = f"{kind}: {symbol} | PRICE: ${price:,.2f}"
+        if previous_close:
+            line += f" | CHANGE: {(price / previous_close - 1) * 100:+.2f}%"
+        for label, attr, spec in (("Market Cap", "market_cap", ",.0f"), ("52-Week Low", "year_low", ",.2f"), ("52-Week High", "year_high", ",.2f")):
+            try:
+                value = getattr(info, attr)
+            except Exception:
+                continue
+            if value:
+                line += f" | {label}: ${value:{spec}}"
+        return line
+
+    def get_current_stock_prices(self, symbols: List[str]) -> str:
+        """
+        Use this function to get the current prices for several symbols at once.
+        Prefer it over repeated single-symbol calls when comparing assets.
+
+        Args:
+            symbols (List[str]): The stock symbols (at most 20).
+
+        Returns:
+            str: JSON object mapping each symbol to its current price or an error message.
+        """
+        import yfinance as yf
+
+        symbols = [s.upper() for s in symbols[:MAX_BATCH_SYMBOLS]]
+        prices = {}
+        missing = []
+        for symbol in symbols:
+            cached = self.cache.get(symbol, "stock_price", self._price_ttl(symbol))
+            if cached is not None:
+                prices[symbol] = cached
+            else:
+                missing.append(symbol)
+
+        if missing:
+            # One batched download instead of a request per symbol.
+            try:
+                df = yf.download(missing, period="5d", group_by="ticker", threads=True, progress=False, auto_adjust=False)
+            except Exception as e:
+                df = None
+                batch_error = str(e)
+            for symbol in missing:
+                try:
+                    if df is None:
+                        raise ValueError(batch_error)
+                    frame = df[symbol] if df.columns.nlevels > 1 else df
+                    price = f"{float(frame['Close'].dropna().iloc[-1]):.4f}"
+                except Exception as e:
+                    prices[symbol] = f"Error fetching current price for {symbol}: {str(e)}"
+                    continue
+                prices[symbol] = price
+                self.cache.set(symbol, "stock_price", price)
+
+        return json.dumps(prices, indent=2)
+
+    def _price_ttl(self, symbol: str) -> float:
+        ttl = self.price_ttl
+        # Equity prices cannot move after the close, so an entry written since then
+        # stays valid until the next open. Entries written before the close are
+        # rejected rather than served as the closing price. Crypto (-USD pairs)
+        # trades around the clock.
+        if not symbol.upper().endswith("-USD"):
+            closed_for = seconds_since_market_close()
+            if closed_for is not None:
+                ttl = closed_for
+        return ttl
+
+    def get_analyst_recommendations(self, symbol: str) -> str:
+        """
+        Use this function to get analyst recommendations for a given stock symbol.
+
+        Args:
+            symbol (str): The stock symbol.
+
+        Returns:
+            str: JSON containing analyst recommendations.
+        """
+        return self._cached(symbol, "analyst_recommendations", self.fundamentals_ttl, super().get_analyst_recommendations)
+
+    def get_stock_fundamentals(self, symbol: str) -> str:
+        """
+        Use this function to get fundamental data for a given stock symbol.
+
+        Args:
+            symbol (str): The stock symbol.
+
+        Returns:
+            str: A JSON string containing fundamental data or an error message.
+        """
+        return self._cached(symbol, "stock_fundamentals", self.fundamentals_ttl, super().get_stock_fundamentals)
@@ -0,0 +1,42 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from agno.tools.duckduckgo import DuckDuckGoTools
+
+MAX_CONCURRENT_SEARCHES = 4
+
+
+class ConcurrentDuckDuckGoTools(DuckDuckGoTools):
+    """DuckDuckGoTools with an extra tool that runs several searches concurrently."""
+
+    def __init__(self, max_concurrency: int = MAX_CONCURRENT_SEARCHES, **kwargs):
+        super().__init__(**kwargs)
+        self.max_concurrency = max_concurrency
+        self.register(self.duckduckgo_multi_search)
+
+    def duckduckgo_multi_search(self, queries: List[str], max_results: int = 5) -> str:
+        """
+        Use this function to search DuckDuckGo for several queries at once.
+        Prefer it over repeated single searches when you need more than one query.
+
+        Args:
+            queries (List[str]): The queries to search for.
+            max_results (int): The maximum number of results per query. Defaults to 5.
+
+        Returns:
+            str: JSON object mapping each query to its search results.
+        """
+        # The DDG client is blocking, so fan out on a small bounded thread pool to
+        # stay clear of DuckDuckGo rate limits.
+        workers = min(self.max_concurrency, max(len(queries), 1))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(lambda q: self.duckduckgo_search(query=q, max_results=max_results), queries))
+
+        combined = {}
+        for query, result in zip(queries, results):
+            try:
+                combined[query] = json.loads(result)
+            except ValueError:
+                combined[query] = result
+        return json.dumps(combined, indent=2)
@@ -0,0 +1,11 @@
+import os
+import sys
+
+# Streamlit runs src/app.py with src/ on the import path, so its helpers are
+# imported as top-level modules (tools.cache); do the same for the tests.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# app.py reads the keys at import; placeholders keep it from falling back to a
+# secrets.toml that does not exist in the test environment.
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("ANTHROPIC_API_KEY", "sk-ant-test")
@@ -1,7 +1,13 @@
-# test_financial_agent.py
+# test_app.py
+
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
 
 import pytest
-from src/app import create_agents, process_query  # Replace `your_module` with your actual module name
+
+import app
+
 
 # --- Dummy Classes for Testing ---
 
@@ -11,87 +17,272 @@ class DummyResult:
         self.content = content
 
 class DummyAgent:
-    """A dummy agent with a run() method that returns a DummyResult."""
-    def run(self, query):
-        return DummyResult(f"Processed query: {query}")
+    """A dummy agent whose arun() returns fixed content and whose run() streams it."""
+    def __init__(self, name, content="", model_id="dummy-model"):
+        self.name = name
+        self.model = SimpleNamespace(id=model_id)
+        self.content = content
+        self.prompts = []
 
-class ExceptionAgent:
-    """A dummy agent whose run() method raises an Exception."""
-    def run(self, query):
+    async def arun(self, prompt):
+        self.prompts.append(prompt)
+        return DummyResult(self.content)
+
+    def run(self, context, stream=False):
+        self.prompts.append(context)
+        return iter([DummyResult(f"Processed: {context.splitlines()[0]}")])
+
+class ExceptionAgent(DummyAgent):
+    """A dummy agent that streams one token and then fails."""
+    def run(self, context, stream=False):
+        yield DummyResult("partial")
         raise Exception("Test exception")
 
+class StubFinanceTools:
+    """Stands in for CachedYFinanceTools: quotes come from a dict, anything else is an error."""
+    def __init__(self, lines=None, recommendations="Error fetching analyst recommendations"):
+        self.lines = lines or {}
+        self.recommendations = recommendations
+        self.symbols = []
+
+    def get_price_line(self, symbol):
+        self.symbols.append(symbol)
+        return self.lines.get(symbol, f"Error fetching current price for {symbol}")
+
+    def get_analyst_recommendations(self, symbol):
+        return self.recommendations
+
 
 # --- Pytest Fixtures ---
 
+@pytest.fixture(autouse=True)
+def finance_tools(monkeypatch):
+    """Clears the process-wide caches and keeps tests off the network: direct
+    quotes fail by default, so the finance agent answers."""
+    app.get_retrieval_cache.clear()
+    app.get_response_cache.clear()
+    tools = StubFinanceTools()
+    monkeypatch.setattr(app, "get_finance_tools", lambda **kwargs: tools)
+    return tools
+
 @pytest.fixture
-def dummy_team_agent():
-    """Provides a dummy team agent for testing process_query."""
-    return DummyAgent()
+def agents():
+    """Provides a web, finance and two team agents in process_query's order."""
+    return (
+        DummyAgent("Web Search Agent", "TSLA trades near $250.00 today."),
+        DummyAgent("Finance Agent", "STOCK: TSLA | PRICE: $250.00 | CHANGE: +1.00%"),
+        DummyAgent("Team Agent"),
+        DummyAgent("Team Agent"),
+    )
+
+def run_query(query, agents, **kwargs):
+    return "".join(app.process_query(query, *agents, now=datetime(2025, 1, 2), **kwargs))
+
+
+# --- Model and agent construction ---
+
+def test_create_agents_returns_four_agents(monkeypatch):
+    """
+    Test that create_agents builds the web, finance and both team agents.
+    """
+    pytest.importorskip("agno.tools.duckduckgo", exc_type=ImportError)
+    pytest.importorskip("agno.tools.yfinance", exc_type=ImportError)
+    monkeypatch.setattr(app, "get_model", lambda model_choice: SimpleNamespace(id=model_choice))
+    agents = app.create_agents("claude-3-5-haiku-20241022")
+    assert len(agents) == 4
+    for agent in agents:
+        assert agent is not None
+        assert hasattr(agent, "run")
+        assert agent.instructions
+
+
+def test_create_model_unknown_choice_uses_default(monkeypatch):
+    """
+    Test that an unknown model choice falls back to the default model.
+    """
+    monkeypatch.setitem(app.MODEL_FACTORIES, app.DEFAULT_MODEL, lambda model_id: SimpleNamespace(id=model_id))
+    model = app.create_model("Invalid Model")
+    assert model.id == app.DEFAULT_MODEL
 
 
-# --- Test Cases ---
+# --- Concurrency ---
 
-def test_create_agents_groq():
+def test_arun_limited_caps_concurrent_calls_in_order(monkeypatch):
     """
-    Test that create_agents returns a valid team agent when "Groq" is chosen.
+    Test that async agent calls beyond the limit wait their turn, first come first served.
     """
-    web_search_agent, finance_agent, team_agent = create_agents("Groq")
-    # Check that the team agent is not None and has a run method
-    assert team_agent is not None
-    assert hasattr(team_agent, "run")
-    # Optionally, check that the instructions list is non-empty
-    assert isinstance(team_agent.instructions, list)
-    assert len(team_agent.instructions) > 0
+    monkeypatch.setattr(app, "LLM_MAX_CONCURRENCY", 2)
+    running = []
+    peak = []
+    started = []
+
+    class SlowAgent(DummyAgent):
+        async def arun(self, prompt):
+            started.append(prompt)
+            running.append(prompt)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.remove(prompt)
+            return DummyResult(prompt)
+
+    agent = SlowAgent("Web Search Agent")
+
+    async def run_all():
+        return await asyncio.gather(*(app.arun_limited(agent, str(i)) for i in range(5)))
 
+    results = app.run_async(run_all())
+    assert [r.content for r in results] == ["0", "1", "2", "3", "4"]
+    assert max(peak) == 2
+    assert started == ["0", "1", "2", "3", "4"]
 
-def test_create_agents_google():
+
+# --- Query processing ---
+
+def test_process_query_success(agents):
     """
-    Test that create_agents returns a valid team agent when "Google Studio" is chosen.
+    Test that process_query streams the team agent's synthesis of the retrieved data.
     """
-    web_search_agent, finance_agent, team_agent = create_agents("Google Studio")
-    assert team_agent is not None
-    assert hasattr(team_agent, "run")
-    assert isinstance(team_agent.instructions, list)
-    assert len(team_agent.instructions) > 0
+    output = run_query("TSLA analysis", agents)
+    assert output == "Processed: Web Data: TSLA trades near $250.00 today."
+    assert agents[1].prompts == ["Get price for TSLA"]
 
 
-def test_create_agents_unknown_model(monkeypatch):
+def test_process_query_exception(agents):
     """
-    Test that an unknown model choice defaults to Groq.
+    Test that a failing team agent yields the fallback after any partial text,
+    and that the failed answer is not cached.
     """
-    warning_messages = []
+    web, finance, _, news = agents
+    failing = ExceptionAgent("Team Agent")
+    output = run_query("TSLA analysis", (web, finance, failing, news))
+    assert output == "partial\n\nFinancial analysis unavailable."
 
-    # Monkey-patch st.warning to capture warning messages instead of displaying them.
-    monkeypatch.setattr("your_module.st.warning", lambda msg: warning_messages.append(msg))
-    
-    web_search_agent, finance_agent, team_agent = create_agents("Invalid Model")
-    # Verify that a warning was issued about the unknown model choice.
-    assert any("Unknown model choice" in message for message in warning_messages)
-    assert team_agent is not None
-    assert hasattr(team_agent, "run")
+    retry = run_query("TSLA analysis", agents)
+    assert retry.startswith("Processed:")
 
 
-def test_process_query_success(dummy_team_agent):
+def test_response_cache_key_separates_comparisons():
     """
-    Test that process_query returns the expected content when a valid query is provided.
+    Test that a comparison and a single-ticker query never share a response.
     """
-    query = "Test Query"
-    output = process_query(query, dummy_team_agent)
-    assert "Processed query: Test Query" in output
+    single, _ = app.response_cache_key("AAPL stock", "gpt-4o", False, True)
+    assert app.response_cache_key("AAPL vs TSLA", "gpt-4o", False, True)[0] != single
+    assert app.response_cache_key("apple analysis", "gpt-4o", False, True)[0] == single
+
+
+def test_response_cache_key_ttl():
+    """
+    Test that per-symbol analyses expire with the analysis cache, while wording-keyed
+    answers use the response cache's default TTL.
+    """
+    assert app.response_cache_key("TSLA price", "gpt-4o", False, True)[1] == app.ANALYSIS_CACHE_TTL
+    assert app.response_cache_key("TSLA news", "gpt-4o", False, True)[1] is None
+    assert app.response_cache_key("TSLA price", "gpt-4o", True, True)[1] is None
+
 
+# --- Direct quotes ---
 
-def test_process_query_empty_query(dummy_team_agent):
+def test_quote_symbols_appends_recommendations_for_one_stock(finance_tools):
     """
-    Test that providing an empty (or whitespace-only) query raises a ValueError.
+    Test that a single stock's quote line is followed by its analyst recommendations.
     """
-    with pytest.raises(ValueError):
-        process_query("    ", dummy_team_agent)
+    finance_tools.lines["TSLA"] = "STOCK: TSLA | PRICE: $250.00 | CHANGE: +1.00%"
+    finance_tools.recommendations = '{"buy": 10}'
+    quoted = app.run_async(app.quote_symbols(("TSLA",)))
+    assert quoted == 'STOCK: TSLA | PRICE: $250.00 | CHANGE: +1.00%\nAnalyst Recommendations: {"buy": 10}'
+
+
+def test_quote_symbols_joins_several_symbols(finance_tools):
+    """
+    Test that a comparison gets one line per symbol, in order, without recommendations.
+    """
+    finance_tools.lines.update({
+        "AAPL": "STOCK: AAPL | PRICE: $210.00",
+        "BTC-USD": "CRYPTO: BTC-USD | PRICE: $97,000.00",
+    })
+    finance_tools.recommendations = '{"buy": 10}'
+    quoted = app.run_async(app.quote_symbols(("AAPL", "BTC-USD")))
+    assert quoted == "STOCK: AAPL | PRICE: $210.00\nCRYPTO: BTC-USD | PRICE: $97,000.00"
+
+
+def test_failed_quote_falls_back_to_finance_agent(finance_tools, agents):
+    """
+    Test that quote_symbols returns None when any lookup fails, and that the
+    finance agent then answers instead.
+    """
+    finance_tools.lines["AAPL"] = "STOCK: AAPL | PRICE: $210.00"
+    assert app.run_async(app.quote_symbols(("AAPL", "TSLA"))) is None
+
+    finance = agents[1]
+    data = app.run_async(app.retrieve_financial_data("AAPL vs TSLA", finance))
+    assert data == finance.content
+    assert finance.prompts == ["Get prices for AAPL, TSLA"]
+
+
+def test_direct_quote_skips_finance_agent(finance_tools, agents):
+    """
+    Test that a successful direct quote is used without calling the finance agent.
+    """
+    finance_tools.lines["TSLA"] = "STOCK: TSLA | PRICE: $250.00 | CHANGE: +1.00%"
+    finance = agents[1]
+    assert app.run_async(app.retrieve_financial_data("TSLA analysis", finance)) == finance_tools.lines["TSLA"]
+    assert finance.prompts == []
+
+
+# --- Empty retrieval ---
+
+@pytest.mark.parametrize("cross_validate", [True, False])
+def test_retrieve_context_returns_none_without_data(monkeypatch, agents, cross_validate):
+    """
+    Test that retrieve_context returns None when YFinance and web search both come back empty.
+    """
+    async def no_finance(query, agent):
+        return "No valid data found"
+
+    async def no_web(query, agent, today):
+        return "No data found."
+
+    monkeypatch.setattr(app, "retrieve_financial_data", no_finance)
+    monkeypatch.setattr(app, "retrieve_web_data", no_web)
+    web, finance, _, _ = agents
+    context = app.run_async(app.retrieve_context("TSLA analysis", web, finance, "2025-01-02", cross_validate))
+    assert context is None
+
+
+@pytest.mark.parametrize("query", ["TSLA analysis", "TSLA news", "tech sector news"])
+def test_empty_retrieval_answers_locally(monkeypatch, agents, query):
+    """
+    Test that every query path answers with the local message, without calling
+    the team agents, when retrieval found nothing.
+    """
+    web, finance, team_analysis, team_news = agents
+    web.content = "No data found."
+    finance.content = "No valid data found"
+    output = run_query(query, agents)
+    assert output == app.INSUFFICIENT_DATA_MESSAGE
+    assert team_analysis.prompts == [] and team_news.prompts == []
+
+
+def test_empty_web_result_is_not_cached(agents):
+    """
+    Test that the web agent's "No data found." answer is retried on the next query
+    instead of being served from the retrieval cache.
+    """
+    web = agents[0]
+    web.content = "No data found."
+    assert run_query("tech sector news", agents) == app.INSUFFICIENT_DATA_MESSAGE
+
+    web.content = "- Chip stocks rally (2025-01-02, example.com)"
+    assert "Chip stocks rally" in run_query("tech sector news", agents)
+    assert len(web.prompts) == 2
 
 
-def test_process_query_exception():
+@pytest.mark.parametrize("query, summarized", [("tech sector news", False), ("MSFT news", True)])
+def test_news_query_uses_team_agent_for_entities(agents, query, summarized):
     """
-    Test that if the agent's run() method raises an exception, process_query 
-    wraps it and raises a RuntimeError.
+    Test that only entity-free news is templated locally; news about any company,
+    known asset or not, goes through the news team agent.
     """
-    with pytest.raises(RuntimeError):
-        process_query("Some query", ExceptionAgent())
+    output = run_query(query, agents)
+    assert output.startswith("Processed:") is summarized
+    assert bool(agents[3].prompts) is summarized
@@ -0,0 +1,143 @@
+# test_cache.py
+
+import os
+import threading
+import time
+
+import pytest
+
+from tools.cache import FileCache, SingleFlight, TTLCache
+
+
+# --- TTLCache ---
+
+def test_ttl_cache_returns_fresh_entries():
+    """
+    Test that a stored value is returned until its TTL elapses.
+    """
+    cache = TTLCache(ttl=60)
+    cache.set("key", "value")
+    assert cache.get("key") == "value"
+    assert cache.get("missing") is None
+
+
+def test_ttl_cache_expires_entries():
+    """
+    Test that entries expire after the default TTL, or a TTL given on get.
+    """
+    cache = TTLCache(ttl=0.01)
+    cache.set("key", "value")
+    time.sleep(0.02)
+    assert cache.get("key") is None
+
+    cache = TTLCache(ttl=60)
+    cache.set("key", "value")
+    time.sleep(0.02)
+    assert cache.get("key", ttl=0.01) is None
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    """
+    Test that the cache stays within maxsize, evicting the least recently used key.
+    """
+    cache = TTLCache(ttl=60, maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_sweeps_expired_entries_on_set():
+    """
+    Test that set drops expired entries, honouring each entry's own TTL.
+    """
+    cache = TTLCache(ttl=0.01)
+    cache.set("short", 1)
+    cache.set("long", 2, ttl=60)
+    time.sleep(0.02)
+    cache.set("new", 3)
+    assert len(cache) == 2
+    assert cache.get("long") == 2
+
+
+# --- SingleFlight ---
+
+def test_single_flight_first_claim_leads():
+    """
+    Test that only the first claim for a key leads and later claims share its future.
+    """
+    flight = SingleFlight()
+    leader_future, is_leader = flight.claim("key")
+    follower_future, follower_leads = flight.claim("key")
+    assert is_leader and not follower_leads
+    assert follower_future is leader_future
+
+    flight.resolve("key", "result")
+    assert follower_future.result(timeout=1) == "result"
+    # Once resolved, the next claim starts a new flight.
+    _, is_leader = flight.claim("key")
+    assert is_leader
+
+
+def test_single_flight_propagates_leader_error():
+    """
+    Test that waiters receive the leader's exception instead of a silent None.
+    """
+    flight = SingleFlight()
+    future, _ = flight.claim("key")
+    results = []
+
+    def wait():
+        try:
+            future.result(timeout=1)
+        except RuntimeError as e:
+            results.append(str(e))
+
+    waiter = threading.Thread(target=wait)
+    waiter.start()
+    flight.resolve("key", error=RuntimeError("leader failed"))
+    waiter.join(timeout=1)
+    assert results == ["leader failed"]
+
+
+# --- FileCache ---
+
+def test_file_cache_round_trip(tmp_path):
+    """
+    Test that entries are persisted to disk and honour the TTL.
+    """
+    cache = FileCache(cache_dir=str(tmp_path))
+    cache.set("aapl", "stock_price", "123.45")
+    assert os.path.exists(tmp_path / "AAPL" / "stock_price.json")
+    assert cache.get("AAPL", "stock_price", ttl=60) == "123.45"
+    assert cache.get("AAPL", "stock_price", ttl=-1) is None
+    # A fresh instance reads the same entry back from disk.
+    assert FileCache(cache_dir=str(tmp_path)).get("AAPL", "stock_price", ttl=60) == "123.45"
+
+
+def test_file_cache_memory_lru(tmp_path):
+    """
+    Test that the in-memory layer keeps at most memory_size recently used entries.
+    """
+    cache = FileCache(cache_dir=str(tmp_path), memory_size=2)
+    cache.set("A", "price", 1)
+    cache.set("B", "price", 2)
+    cache.get("A", "price", ttl=60)
+    cache.set("C", "price", 3)
+    remembered = list(cache._memory)
+    assert len(remembered) == 2
+    assert cache._path("B", "price") not in remembered
+    # Evicted entries are still served from disk.
+    assert cache.get("B", "price", ttl=60) == 2
+
+
+@pytest.mark.parametrize("endpoint", ["stock_price", "analyst_recommendations"])
+def test_file_cache_missing_entry(tmp_path, endpoint):
+    """
+    Test that a lookup with nothing on disk returns None.
+    """
+    assert FileCache(cache_dir=str(tmp_path)).get("MSFT", endpoint, ttl=60) is None
@@ -0,0 +1,201 @@
+# test_cached_yfinance.py
+
+import json
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+cached_yfinance = pytest.importorskip("tools.cached_yfinance", exc_type=ImportError)
+yfinance = pytest.importorskip("yfinance")
+pd = pytest.importorskip("pandas")
+
+
+def at(*args):
+    return datetime(*args, tzinfo=cached_yfinance.MARKET_TZ)
+
+
+@pytest.fixture
+def tools(monkeypatch, tmp_path):
+    """Provides a toolkit with an empty cache, during market hours."""
+    monkeypatch.setattr(cached_yfinance, "seconds_since_market_close", lambda: None)
+    return cached_yfinance.CachedYFinanceTools(cache=cached_yfinance.FileCache(str(tmp_path)), price_ttl=900)
+
+
+@pytest.fixture
+def tickers(monkeypatch):
+    """Stubs yf.Ticker with fast_info from a {symbol: SimpleNamespace} dict and records lookups."""
+    quotes = {}
+    calls = []
+
+    def ticker(symbol):
+        calls.append(symbol)
+        if symbol not in quotes:
+            raise KeyError(symbol)
+        return SimpleNamespace(fast_info=quotes[symbol])
+
+    monkeypatch.setattr(yfinance, "Ticker", ticker)
+    return quotes, calls
+
+
+# --- Market session ---
+
+def test_seconds_since_market_close_is_none_during_session():
+    """
+    Test that no close is reported while the market is open.
+    """
+    assert cached_yfinance.seconds_since_market_close(at(2025, 1, 2, 10, 0)) is None
+
+
+@pytest.mark.parametrize("now, expected", [
+    (at(2025, 1, 2, 16, 5), 5 * 60),            # Thursday evening
+    (at(2025, 1, 3, 9, 0), 17 * 3600),          # Friday before the open
+    (at(2025, 1, 6, 9, 0), 65 * 3600),          # Monday before the open, back to Friday
+    (at(2025, 1, 4, 12, 0), 20 * 3600),         # Saturday
+    (at(2025, 3, 10, 9, 0), 64 * 3600),         # Monday after clocks sprang forward
+    (at(2025, 11, 3, 9, 0), 66 * 3600),         # Monday after clocks fell back
+])
+def test_seconds_since_market_close_after_close(now, expected):
+    """
+    Test that the last close skips back over the weekend, in elapsed time across DST changes.
+    """
+    assert cached_yfinance.seconds_since_market_close(now) == expected
+
+
+# --- Price TTL ---
+
+def test_price_ttl_rejects_quotes_from_before_the_close(monkeypatch, tmp_path):
+    """
+    Test that after the close only entries written since the close are served,
+    while crypto keeps the regular TTL.
+    """
+    monkeypatch.setattr(cached_yfinance, "seconds_since_market_close", lambda: 300)
+    tools = cached_yfinance.CachedYFinanceTools(
+        cache=cached_yfinance.FileCache(str(tmp_path)), price_ttl=900
+    )
+    assert tools._price_ttl("AAPL") == 300
+    assert tools._price_ttl("BTC-USD") == 900
+
+
+# --- Direct quote lines ---
+
+def test_get_price_line_formats_and_caches(tools, tickers):
+    """
+    Test that the tagged quote line carries price, change and the optional
+    fields, and that a second lookup is served from the cache.
+    """
+    quotes, calls = tickers
+    quotes["AAPL"] = SimpleNamespace(last_price=210.0, previous_close=200.0, market_cap=3.2e12, year_low=164.08, year_high=260.1)
+    expected = (
+        "STOCK: AAPL | PRICE: $210.00 | CHANGE: +5.00% | Market Cap: $3,200,000,000,000"
+        " | 52-Week Low: $164.08 | 52-Week High: $260.10"
+    )
+    assert tools.get_price_line("aapl") == expected
+    assert tools.get_price_line("AAPL") == expected
+    assert calls == ["AAPL"]
+
+
+def test_get_price_line_tags_crypto_and_skips_missing_fields(tools, tickers):
+    """
+    Test that -USD pairs are tagged as crypto and empty fields are left out.
+    """
+    quotes, _ = tickers
+    quotes["BTC-USD"] = SimpleNamespace(last_price=97000.5, previous_close=None, market_cap=None, year_low=None, year_high=None)
+    assert tools.get_price_line("BTC-USD") == "CRYPTO: BTC-USD | PRICE: $97,000.50"
+
+
+def test_get_price_line_does_not_cache_errors(tools, tickers):
+    """
+    Test that a failed lookup returns an error string and is retried next time.
+    """
+    quotes, calls = tickers
+    assert tools.get_price_line("NOPE").startswith("Error fetching current price for NOPE")
+    quotes["NOPE"] = SimpleNamespace(last_price=0, previous_close=None)
+    assert tools.get_price_line("NOPE") == "Could not fetch current price for NOPE"
+    assert calls == ["NOPE", "NOPE"]
+
+
+# --- Batched prices ---
+
+@pytest.fixture
+def download(monkeypatch):
+    """Stubs yf.download to return the frame (or raise the exception) in result[0], and records requests."""
+    result = [None]
+    calls = []
+
+    def fake_download(symbols, **kwargs):
+        calls.append(list(symbols))
+        if isinstance(result[0], Exception):
+            raise result[0]
+        return result[0]
+
+    monkeypatch.setattr(yfinance, "download", fake_download)
+    return result, calls
+
+
+def closes(**series):
+    """Build a group_by="ticker" frame with (symbol, "Close") columns."""
+    return pd.concat({symbol: pd.DataFrame({"Close": values}) for symbol, values in series.items()}, axis=1)
+
+
+def test_get_current_stock_prices_parses_multiindex(tools, download):
+    """
+    Test that each symbol's last non-missing close is read from a batched frame,
+    and that a symbol missing from the frame gets its own error.
+    """
+    result, calls = download
+    result[0] = closes(AAPL=[200.0, 210.0], TSLA=[250.0, None])
+    prices = json.loads(tools.get_current_stock_prices(["aapl", "TSLA", "NOPE"]))
+    assert prices["AAPL"] == "210.0000"
+    assert prices["TSLA"] == "250.0000"
+    assert prices["NOPE"].startswith("Error fetching current price for NOPE")
+    assert calls == [["AAPL", "TSLA", "NOPE"]]
+
+
+def test_get_current_stock_prices_parses_flat_columns(tools, download):
+    """
+    Test that a single-level frame is read as the only symbol's data.
+    """
+    result, _ = download
+    result[0] = pd.DataFrame({"Close": [99.5, 101.25]})
+    assert json.loads(tools.get_current_stock_prices(["NVDA"])) == {"NVDA": "101.2500"}
+
+
+def test_get_current_stock_prices_caches_successes(tools, download):
+    """
+    Test that successful prices are cached per symbol, so only failed or new
+    symbols are downloaded again.
+    """
+    result, calls = download
+    result[0] = closes(AAPL=[210.0])
+    tools.get_current_stock_prices(["AAPL", "TSLA"])
+    result[0] = closes(TSLA=[250.0])
+    prices = json.loads(tools.get_current_stock_prices(["AAPL", "TSLA"]))
+    assert prices == {"AAPL": "210.0000", "TSLA": "250.0000"}
+    assert calls == [["AAPL", "TSLA"], ["TSLA"]]
+    assert tools.get_current_stock_price("AAPL") == "210.0000"
+
+
+def test_get_current_stock_prices_reports_batch_failure(tools, download):
+    """
+    Test that a failed download is reported for every requested symbol.
+    """
+    result, _ = download
+    result[0] = ConnectionError("rate limited")
+    prices = json.loads(tools.get_current_stock_prices(["AAPL", "TSLA"]))
+    assert prices == {
+        "AAPL": "Error fetching current price for AAPL: rate limited",
+        "TSLA": "Error fetching current price for TSLA: rate limited",
+    }
+
+
+def test_get_current_stock_prices_truncates_symbols(tools, download):
+    """
+    Test that at most MAX_BATCH_SYMBOLS symbols are requested and returned.
+    """
+    result, calls = download
+    symbols = [f"S{i}" for i in range(cached_yfinance.MAX_BATCH_SYMBOLS + 5)]
+    result[0] = closes(**{symbol: [1.0] for symbol in symbols})
+    prices = json.loads(tools.get_current_stock_prices(symbols))
+    assert list(prices) == symbols[:cached_yfinance.MAX_BATCH_SYMBOLS]
+    assert calls == [symbols[:cached_yfinance.MAX_BATCH_SYMBOLS]]
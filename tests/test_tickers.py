@@ -0,0 +1,131 @@
+# test_tickers.py
+
+import pytest
+
+from tickers import ASSET_MAPPING, extract_price, find_assets, is_news_query, names_entity, news_topic, resolve_ticker, symbol_key
+
+
+# --- Ticker resolution ---
+
+@pytest.mark.parametrize("query, expected", [
+    ("BTC", "BTC-USD"),
+    ("bitcoin", "BTC-USD"),
+    ("Ethereum price", "ETH-USD"),
+    ("solana analysis", "SOL-USD"),
+    ("Apple stock", "AAPL"),
+    ("  tsla  ", "TSLA"),
+])
+def test_resolve_ticker_known_assets(query, expected):
+    """
+    Test that symbols and name aliases resolve to the mapped ticker.
+    """
+    assert resolve_ticker(query) == expected
+
+
+def test_resolve_ticker_whole_words_only():
+    """
+    Test that asset keys only match whole words, so "SOLAR" is not SOL and
+    "SOLANA" resolves through its alias rather than the "SOL" prefix.
+    """
+    assert resolve_ticker("SOLAR") == "SOLAR"
+    assert find_assets("SOLANA") == ("SOL-USD",)
+    assert find_assets("solar panels") == ()
+
+
+def test_resolve_ticker_falls_back_to_cleaned_query():
+    """
+    Test that unknown input is upper-cased and stripped of non-ticker characters.
+    """
+    assert resolve_ticker("msft!") == "MSFT"
+    assert resolve_ticker("brk-b") == "BRK-B"
+
+
+def test_asset_mapping_is_read_only():
+    """
+    Test that the shared mapping cannot be mutated at runtime.
+    """
+    with pytest.raises(TypeError):
+        ASSET_MAPPING["DOGE"] = "DOGE-USD"
+
+
+# --- Multi-asset extraction ---
+
+def test_find_assets_keeps_order_and_dedupes():
+    """
+    Test that every mentioned asset is returned once, in first-seen order.
+    """
+    assert find_assets("Compare ETH, bitcoin and BTC") == ("ETH-USD", "BTC-USD")
+    assert find_assets("AAPL vs TSLA vs NVDA") == ("AAPL", "TSLA", "NVDA")
+
+
+def test_symbol_key_separates_comparisons():
+    """
+    Test that a comparison never shares a key with one of its single-ticker queries.
+    """
+    assert symbol_key("AAPL vs TSLA") == "AAPL,TSLA"
+    assert symbol_key("AAPL stock") == "AAPL"
+    assert symbol_key("apple analysis") == symbol_key("AAPL price")
+    assert symbol_key("msft") == "MSFT"
+
+
+# --- Query classification ---
+
+def test_is_news_query_matches_whole_words():
+    """
+    Test that news keywords only select news mode as whole words.
+    """
+    assert is_news_query("Bitcoin trends")
+    assert is_news_query("Latest TSLA headline")
+    assert not is_news_query("TSLA newsletter analysis")
+
+
+def test_news_topic_ignores_filler_and_aliases():
+    """
+    Test that paraphrases of one news request share a topic key.
+    """
+    assert news_topic("Latest tech news") == news_topic("tech news")
+    assert news_topic("News about Apple AAPL") == news_topic("AAPL news") == "AAPL"
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("tech sector news", False),
+    ("Latest market headlines", False),
+    ("Bitcoin trends", True),
+    ("MSFT news", True),
+    ("Amazon earnings news", True),
+])
+def test_names_entity(query, expected):
+    """
+    Test that any non-generic topic word counts as a company or asset, not just known assets.
+    """
+    assert names_entity(query) is expected
+
+
+# --- Price extraction ---
+
+@pytest.mark.parametrize("data, expected", [
+    ("CRYPTO: SOL-USD | PRICE: $167.92 | CHANGE: +2.14%", 167.92),
+    ("STOCK: AAPL | PRICE: $1,234.50 | CHANGE: -0.50%", 1234.50),
+    ("Header\nSTOCK: TSLA | PRICE: $250 | CHANGE: 1%\nTarget: $400", 250.0),
+])
+def test_extract_price_tagged_lines(data, expected):
+    """
+    Test that the strict tagged formats win over any other dollar amount.
+    """
+    assert extract_price(data) == pytest.approx(expected)
+
+
+def test_extract_price_requires_single_token_symbol():
+    """
+    Test that a tag followed by a multi-word symbol is not treated as tagged.
+    """
+    data = "STOCK: NOT A SYMBOL | PRICE: $5.00 and later $7.00"
+    assert extract_price(data) == pytest.approx(7.0)
+
+
+def test_extract_price_generic_fallback():
+    """
+    Test that untagged text yields the largest parseable dollar amount.
+    """
+    assert extract_price("Trading near $98.10, up from $95.00; cap $1,900") == pytest.approx(1900.0)
+    assert extract_price("No prices here") is None